@@ -1,55 +1,39 @@
 """
 AI Topic Researcher - Dynamic content topic research using OpenAI
 """
+import json
+import logging
 import os
-from typing import Optional
-from openai import OpenAI
+import re
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, List, Optional
 from .models import TopicResearchRequest, TopicResearchResult
+from .cache import ResearchCache
 
+logger = logging.getLogger(__name__)
 
-class AITopicResearcher:
-    """AI-powered topic researcher for dynamic content research"""
-    
-    def __init__(self, api_key: Optional[str] = None):
-        """
-        Initialize the AI Topic Researcher
-        
-        Args:
-            api_key: OpenAI API key. If not provided, uses OPENAI_API_KEY env var
-        """
-        self.api_key = api_key or os.getenv("OPENAI_API_KEY")
-        if not self.api_key:
-            raise ValueError("OpenAI API key is required. Set OPENAI_API_KEY environment variable or pass api_key parameter.")
-        
-        self.client = OpenAI(api_key=self.api_key)
-    
-    def research_topic(self, request: TopicResearchRequest) -> TopicResearchResult:
-        """
-        Research a topic dynamically using AI
-        
-        Args:
-            request: Topic research request with topic and parameters
-            
-        Returns:
-            TopicResearchResult with comprehensive research findings
-        """
-        # Build the research prompt based on depth and focus areas
-        depth_instructions = {
-            "quick": "Provide a quick overview with 3-5 key points.",
-            "standard": "Provide comprehensive research with detailed insights.",
-            "deep": "Provide in-depth research with extensive analysis and multiple perspectives."
-        }
-        
-        depth_instruction = depth_instructions.get(request.depth, depth_instructions["standard"])
-        
-        # Build focus areas instruction
-        focus_instruction = ""
-        if request.focus_areas:
-            focus_instruction = f"\n\nFocus particularly on: {', '.join(request.focus_areas)}"
-        
-        prompt = f"""Research the following topic and provide comprehensive insights: "{request.topic}"
+MODEL = "gpt-3.5-turbo"
+MAX_TOKENS = 1500
 
-{depth_instruction}{focus_instruction}
+# SYSTEM_PROMPT and the fixed text of the prompt templates form a byte-stable
+# prefix that providers can reuse across requests.
+# Cache keys already hash the full system and user prompts, so wording changes
+# need no version bump. Bump PROMPT_VERSION when cached responses must be
+# discarded while the prompt text stays the same, e.g. after changing request
+# parameters such as temperature or a parsing contract the old responses break.
+PROMPT_VERSION = "2"
+SYSTEM_PROMPT = "You are an expert researcher and content strategist who provides comprehensive, accurate research on any topic to help inform content creation. Always provide specific, actionable insights."
+
+# Prompt instruction for each supported research depth
+DEPTH_INSTRUCTIONS = {
+    "quick": "Provide a quick overview with 3-5 key points.",
+    "standard": "Provide comprehensive research with detailed insights.",
+    "deep": "Provide in-depth research with extensive analysis and multiple perspectives."
+}
+
+# User prompt; the response format here must match SECTION_HEADERS below
+RESEARCH_PROMPT_TEMPLATE = """Research the topic given at the end of this message and provide comprehensive insights.
 
 Provide your research in the following structured format:
 
@@ -95,37 +79,91 @@ COMPETITOR INSIGHTS:
 KEYWORDS:
 [Comma-separated list of 8-12 important keywords]
 
-Make sure all information is current, accurate, and useful for content creation."""
-        
-        response = self.client.chat.completions.create(
-            model="gpt-3.5-turbo",
-            messages=[
-                {
-                    "role": "system",
-                    "content": "You are an expert researcher and content strategist who provides comprehensive, accurate research on any topic to help inform content creation. Always provide specific, actionable insights."
-                },
-                {
-                    "role": "user",
-                    "content": prompt
-                }
-            ],
-            temperature=0.7,
-            max_tokens=1500
-        )
-        
-        # Parse the response
-        research_text = response.choices[0].message.content.strip()
-        
-        # Extract sections from the response
-        result = self._parse_research_response(request.topic, research_text)
-        
-        return result
+Make sure all information is current, accurate, and useful for content creation.
+
+{depth_instruction}{focus_instruction}
+
+Topic: "{topic}\""""
+
+# User prompt for JSON mode; keys must match the fields in SECTION_HEADERS below
+RESEARCH_JSON_PROMPT_TEMPLATE = """Research the topic given at the end of this message and provide comprehensive insights.
+
+Respond with a JSON object using exactly these keys:
+- "summary": a 2-3 sentence summary of the topic
+- "key_points": 5-8 key points
+- "trends": 3-5 current trends
+- "statistics": 3-5 relevant statistics and data points
+- "audience_interests": 3-5 things audiences care about regarding this topic
+- "content_angles": 3-5 suggested angles for content
+- "competitor_insights": 3-5 insights on how competitors approach this topic, what successful content exists, and content gaps
+- "keywords": 8-12 important keywords and phrases
+
+Every key except "summary" holds an array of strings.
+
+Make sure all information is current, accurate, and useful for content creation.
+
+{depth_instruction}{focus_instruction}
+
+Topic: "{topic}\""""
+
+# Section headers in the response mapped to result field names
+SECTION_HEADERS = {
+    "SUMMARY:": "summary",
+    "KEY POINTS:": "key_points",
+    "CURRENT TRENDS:": "trends",
+    "STATISTICS": "statistics",
+    "AUDIENCE INTERESTS:": "audience_interests",
+    "CONTENT ANGLES:": "content_angles",
+    "COMPETITOR INSIGHTS:": "competitor_insights",
+    "KEYWORDS:": "keywords",
+}
+SECTION_HEADER_RE = re.compile('(' + '|'.join(re.escape(header) for header in SECTION_HEADERS) + ')')
+SECTION_HEADER_INITIALS = frozenset(header[0] for header in SECTION_HEADERS)
+
+# Called with a result field name and its parsed value (str for summary, list otherwise)
+SectionCallback = Callable[[str, object], None]
+
+
+def _summary_from_text(research_text: str) -> str:
+    """Build a fallback summary from the first few sentences of the text"""
+    sentences = research_text.split('.')[:3]
+    return '. '.join([s.strip() for s in sentences if s.strip()]) + '.'
+
+
+def _flatten_json_items(value) -> List[str]:
+    """Flatten a JSON value into non-empty strings, descending into lists and objects"""
+    if isinstance(value, dict):
+        value = list(value.values())
+    if isinstance(value, list):
+        return [item for element in value for item in _flatten_json_items(element)]
+    if isinstance(value, (str, int, float)) and not isinstance(value, bool):
+        text = str(value).strip()
+        return [text] if text else []
+    return []
+
+
+class StreamingResearchParser:
+    """Incremental parser for research responses, fed as text chunks arrive"""
     
-    def _parse_research_response(self, topic: str, research_text: str) -> TopicResearchResult:
-        """Parse the AI research response into a structured result"""
+    def __init__(self, topic: str, on_section: Optional[SectionCallback] = None):
+        """
+        Initialize the parser
         
-        sections = {
-            "summary": "",
+        Args:
+            topic: The researched topic
+            on_section: Optional callback invoked with (section, value) when a
+                section is complete. If the response repeats a header, the
+                callback only receives the items added since the last report.
+        """
+        self.topic = topic
+        self.on_section = on_section
+        self._chunks = []
+        self._pending = ""
+        self._current_section = None
+        # Number of items already passed to on_section, per section
+        self._reported = {}
+        self._sections = {
+            "summary": [],
             "key_points": [],
             "trends": [],
             "statistics": [],
@@ -134,66 +172,34 @@ Make sure all information is current, accurate, and useful for content creation.
             "competitor_insights": [],
             "keywords": []
         }
+    
+    def feed(self, text: str):
+        """Consume the next chunk of response text"""
+        self._chunks.append(text)
+        # Only complete lines are parsed; a partial line waits for the next chunk
+        *lines, self._pending = (self._pending + text).split('\n')
+        for line in lines:
+            self._process_line(line)
+    
+    def finalize(self) -> TopicResearchResult:
+        """Parse any remaining text and build the research result"""
+        if self._pending:
+            self._process_line(self._pending)
+            self._pending = ""
+        self._start_section(None)
         
-        current_section = None
+        sections = self._sections
         
-        for line in research_text.split('\n'):
-            line = line.strip()
-            
-            # Detect section headers
-            if line.startswith('SUMMARY:'):
-                current_section = 'summary'
-                continue
-            elif line.startswith('KEY POINTS:'):
-                current_section = 'key_points'
-                continue
-            elif line.startswith('CURRENT TRENDS:'):
-                current_section = 'trends'
-                continue
-            elif line.startswith('STATISTICS') or line.startswith('STATISTICS & DATA:'):
-                current_section = 'statistics'
-                continue
-            elif line.startswith('AUDIENCE INTERESTS:'):
-                current_section = 'audience_interests'
-                continue
-            elif line.startswith('CONTENT ANGLES:'):
-                current_section = 'content_angles'
-                continue
-            elif line.startswith('COMPETITOR INSIGHTS:'):
-                current_section = 'competitor_insights'
-                continue
-            elif line.startswith('KEYWORDS:'):
-                current_section = 'keywords'
-                continue
-            
-            # Process content based on current section
-            if not line or not current_section:
-                continue
-            
-            if current_section == 'summary':
-                sections['summary'] += line + ' '
-            elif current_section == 'keywords':
-                # Split by comma for keywords
-                keywords = [k.strip() for k in line.split(',') if k.strip()]
-                sections['keywords'].extend(keywords)
-            elif line.startswith('- ') or line.startswith('* '):
-                # Remove bullet points and add to appropriate list
-                clean_line = line[2:].strip()
-                if clean_line:
-                    sections[current_section].append(clean_line)
-        
-        # Clean up summary
-        sections['summary'] = sections['summary'].strip()
+        # Join summary lines once at the end
+        summary = ' '.join(sections['summary'])
         
         # If summary is empty, create one from the research text
-        if not sections['summary']:
-            # Take the first few sentences as summary
-            sentences = research_text.split('.')[:3]
-            sections['summary'] = '. '.join([s.strip() for s in sentences if s.strip()]) + '.'
+        if not summary:
+            summary = _summary_from_text(''.join(self._chunks).strip())
         
         return TopicResearchResult(
-            topic=topic,
-            summary=sections['summary'],
+            topic=self.topic,
+            summary=summary,
             key_points=sections['key_points'],
             trends=sections['trends'],
             statistics=sections['statistics'],
@@ -202,3 +208,331 @@ Make sure all information is current, accurate, and useful for content creation.
             competitor_insights=sections['competitor_insights'],
             keywords=sections['keywords']
         )
+    
+    def _start_section(self, section: Optional[str]):
+        """Close the current section, notifying the callback, and open the next"""
+        finished = self._current_section
+        if finished and self.on_section:
+            # Slicing copies, so the callback never sees items collected later
+            reported = self._reported.get(finished)
+            value = self._sections[finished][reported or 0:]
+            self._reported[finished] = len(self._sections[finished])
+            # A repeated header with nothing new is not reported again
+            if reported is None or value:
+                self.on_section(finished, ' '.join(value) if finished == 'summary' else value)
+        self._current_section = section
+    
+    def _process_line(self, line: str):
+        """Parse a single complete line of the response"""
+        line = line.strip()
+        
+        # Detect section headers; cheap checks skip the regex for bullets and prose
+        if line[:1] in SECTION_HEADER_INITIALS and line[:2].isupper():
+            header = SECTION_HEADER_RE.match(line)
+            if header:
+                self._start_section(SECTION_HEADERS[header.group(1)])
+                return
+        
+        current_section = self._current_section
+        sections = self._sections
+        
+        # Process content based on current section
+        if not line or not current_section:
+            return
+        
+        if current_section == 'summary':
+            sections['summary'].append(line)
+        elif current_section == 'keywords':
+            # Split by comma for keywords
+            keywords = [k.strip() for k in line.split(',') if k.strip()]
+            sections['keywords'].extend(keywords)
+        elif line.startswith('- ') or line.startswith('* '):
+            # Remove bullet points and add to appropriate list
+            clean_line = line[2:].strip()
+            if clean_line:
+                sections[current_section].append(clean_line)
+
+
+class AITopicResearcher:
+    """AI-powered topic researcher for dynamic content research"""
+    
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        cache_path: Optional[str] = None,
+        json_mode: bool = False,
+        model: str = MODEL,
+        max_tokens: int = MAX_TOKENS
+    ):
+        """
+        Initialize the AI Topic Researcher
+        
+        Args:
+            api_key: OpenAI API key. If not provided, uses OPENAI_API_KEY env var
+            cache_path: Optional SQLite file for caching AI responses. Identical
+                requests are answered from the cache instead of calling the API.
+            json_mode: Request structured JSON output instead of the sectioned
+                text format. Responses are not streamed in this mode.
+            model: OpenAI chat model used for research
+            max_tokens: Completion token budget per request
+        """
+        self.api_key = api_key or os.getenv("OPENAI_API_KEY")
+        if not self.api_key:
+            raise ValueError("OpenAI API key is required. Set OPENAI_API_KEY environment variable or pass api_key parameter.")
+        
+        self._client = None
+        self._client_lock = threading.Lock()
+        self.cache = ResearchCache(cache_path) if cache_path else None
+        self.json_mode = json_mode
+        self.model = model
+        self.max_tokens = max_tokens
+        
+        # Futures for research calls in progress, keyed by request, so identical
+        # concurrent calls wait for one API call instead of each making their own
+        self._inflight = {}
+        self._inflight_lock = threading.Lock()
+    
+    @property
+    def client(self):
+        """OpenAI client, created on first use"""
+        if self._client is None:
+            # Locked so pool threads making the first access share one client
+            with self._client_lock:
+                if self._client is None:
+                    # Deferred so importing this module does not load the OpenAI SDK
+                    from openai import OpenAI
+                    self._client = OpenAI(api_key=self.api_key)
+        return self._client
+    
+    @client.setter
+    def client(self, client):
+        """Use a caller-supplied client, such as an Azure or proxy client"""
+        self._client = client
+    
+    def research_topic(
+        self,
+        request: TopicResearchRequest,
+        use_cache: bool = True,
+        on_section: Optional[SectionCallback] = None
+    ) -> TopicResearchResult:
+        """
+        Research a topic dynamically using AI
+        
+        Args:
+            request: Topic research request with topic and parameters
+            use_cache: Reuse a cached response when a cache is configured
+            on_section: Optional callback invoked with (section, value) as soon as
+                each section is complete. When given, the response is streamed so
+                early sections arrive before the whole answer is generated.
+                Without a callback, concurrent identical calls share one API call.
+            
+        Returns:
+            TopicResearchResult with comprehensive research findings
+        """
+        prompt = self._build_prompt(request)
+        request_key = ResearchCache.make_key(PROMPT_VERSION, self.model, str(self.max_tokens), SYSTEM_PROMPT, prompt)
+        
+        if on_section:
+            # Each streaming caller needs its own callbacks, so these are not coalesced
+            return self._research(request, prompt, request_key, use_cache, on_section)
+        
+        inflight_key = (request_key, use_cache)
+        with self._inflight_lock:
+            future = self._inflight.get(inflight_key)
+            is_owner = future is None
+            if is_owner:
+                future = Future()
+                self._inflight[inflight_key] = future
+        
+        if not is_owner:
+            # Waiters get their own copy so the owner's result is never shared
+            return future.result().model_copy(deep=True)
+        
+        try:
+            result = self._research(request, prompt, request_key, use_cache, None)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._inflight_lock:
+                del self._inflight[inflight_key]
+    
+    def _research(
+        self,
+        request: TopicResearchRequest,
+        prompt: str,
+        request_key: str,
+        use_cache: bool,
+        on_section: Optional[SectionCallback]
+    ) -> TopicResearchResult:
+        """Run a single research request, consulting the cache first"""
+        use_cache = bool(self.cache and use_cache)
+        research_text = self.cache.get(request_key) if use_cache else None
+        
+        parser = StreamingResearchParser(request.topic, on_section)
+        streamed = False
+        
+        if research_text is None:
+            messages = [
+                {
+                    "role": "system",
+                    "content": SYSTEM_PROMPT
+                },
+                {
+                    "role": "user",
+                    "content": prompt
+                }
+            ]
+            
+            if on_section and not self.json_mode:
+                # Stream the response so completed sections reach the caller early
+                stream = self.client.chat.completions.create(
+                    model=self.model,
+                    messages=messages,
+                    temperature=0.7,
+                    max_tokens=self.max_tokens,
+                    stream=True
+                )
+                parts = []
+                for chunk in stream:
+                    if not chunk.choices:
+                        continue
+                    delta = chunk.choices[0].delta.content
+                    if delta:
+                        parts.append(delta)
+                        parser.feed(delta)
+                research_text = ''.join(parts).strip()
+                streamed = True
+            else:
+                extra_params = {"response_format": {"type": "json_object"}} if self.json_mode else {}
+                response = self.client.chat.completions.create(
+                    model=self.model,
+                    messages=messages,
+                    temperature=0.7,
+                    max_tokens=self.max_tokens,
+                    **extra_params
+                )
+                research_text = response.choices[0].message.content.strip()
+            
+            if use_cache:
+                self.cache.set(request_key, research_text)
+        
+        if self.json_mode:
+            return self._parse_research_json(request.topic, research_text, on_section)
+        
+        if not streamed:
+            parser.feed(research_text)
+        return parser.finalize()
+    
+    def _build_prompt(self, request: TopicResearchRequest) -> str:
+        """Build the research prompt based on depth and focus areas"""
+        depth_instruction = DEPTH_INSTRUCTIONS.get(request.depth, DEPTH_INSTRUCTIONS["standard"])
+        
+        # Build focus areas instruction
+        focus_instruction = ""
+        if request.focus_areas:
+            focus_instruction = f"\n\nFocus particularly on: {', '.join(request.focus_areas)}"
+        
+        template = RESEARCH_JSON_PROMPT_TEMPLATE if self.json_mode else RESEARCH_PROMPT_TEMPLATE
+        return template.format(
+            topic=request.topic,
+            depth_instruction=depth_instruction,
+            focus_instruction=focus_instruction
+        )
+    
+    def research_topics(
+        self,
+        requests: List[TopicResearchRequest],
+        max_concurrency: int = 4,
+        use_cache: bool = True
+    ) -> List[TopicResearchResult]:
+        """
+        Research several topics concurrently
+        
+        Args:
+            requests: Topic research requests to run
+            max_concurrency: Maximum number of API calls in flight at once
+            use_cache: Reuse cached responses when a cache is configured
+            
+        Returns:
+            List of TopicResearchResult in the same order as the requests.
+            Duplicate requests are researched once; each repeat gets its own copy
+            of the result.
+            
+        Raises:
+            ValueError: If max_concurrency is less than 1
+        """
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be at least 1")
+        
+        if not requests:
+            return []
+        
+        # Requests that build the same prompt get the same answer; research each once
+        prompts = [self._build_prompt(request) for request in requests]
+        unique = {}
+        for prompt, request in zip(prompts, requests):
+            unique.setdefault(prompt, request)
+        
+        workers = min(max_concurrency, len(unique))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            results = dict(zip(unique, executor.map(
+                lambda request: self.research_topic(request, use_cache=use_cache),
+                unique.values()
+            )))
+        
+        # Hand repeats a deep copy so callers can mutate results independently
+        seen = set()
+        ordered = []
+        for prompt in prompts:
+            result = results[prompt]
+            ordered.append(result.model_copy(deep=True) if prompt in seen else result)
+            seen.add(prompt)
+        return ordered
+    
+    def _parse_research_response(self, topic: str, research_text: str) -> TopicResearchResult:
+        """Parse the AI research response into a structured result"""
+        parser = StreamingResearchParser(topic)
+        parser.feed(research_text)
+        return parser.finalize()
+    
+    def _parse_research_json(
+        self,
+        topic: str,
+        research_text: str,
+        on_section: Optional[SectionCallback] = None
+    ) -> TopicResearchResult:
+        """Parse a JSON-mode research response into a structured result"""
+        try:
+            data = json.loads(research_text)
+        except json.JSONDecodeError:
+            data = None
+        
+        if not isinstance(data, dict):
+            # Fall back to the section parser if the model did not return a JSON object
+            logger.warning("JSON mode response for %r was not a JSON object; parsing as sections", topic)
+            parser = StreamingResearchParser(topic, on_section)
+            parser.feed(research_text)
+            return parser.finalize()
+        
+        fields = {}
+        for field in SECTION_HEADERS.values():
+            value = data.get(field)
+            if field == 'keywords' and isinstance(value, str):
+                value = value.split(',')
+            items = _flatten_json_items(value)
+            fields[field] = ' '.join(items) if field == 'summary' else items
+        
+        # Same fallback as the section parser, drawn from the parsed content
+        if not fields['summary']:
+            content = [item for field, items in fields.items() if field != 'summary' for item in items]
+            fields['summary'] = _summary_from_text('. '.join(content))
+        
+        if on_section:
+            for field, value in fields.items():
+                on_section(field, value)
+        
+        return TopicResearchResult(topic=topic, **fields)
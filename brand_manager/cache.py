@@ -0,0 +1,87 @@
+"""
+Research Cache - On-disk cache for AI research responses
+"""
+import hashlib
+import logging
+import sqlite3
+import threading
+import time
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+
+class ResearchCache:
+    """SQLite-backed cache mapping request keys to raw AI responses"""
+
+    def __init__(self, db_path: str = "research_cache.db"):
+        """
+        Initialize the research cache
+
+        Args:
+            db_path: Path to the SQLite database file
+        """
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        # One connection for the cache's lifetime, shared across threads under a lock.
+        # If the database cannot be opened, the cache stays disabled and always misses.
+        self._conn = None
+        try:
+            self._conn = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+            self._init_database()
+        except sqlite3.Error:
+            logger.warning("Research cache unavailable at %s; continuing without it", db_path, exc_info=True)
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def _init_database(self):
+        """Configure the connection and create the cache table if needed"""
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS research_cache (
+                    key TEXT PRIMARY KEY,
+                    response TEXT NOT NULL,
+                    created REAL NOT NULL
+                )
+            """)
+
+    @staticmethod
+    def make_key(*parts: str) -> str:
+        """Build a stable cache key from the parts that determine a response"""
+        return hashlib.sha256('|'.join(parts).encode('utf-8')).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached response for a key, or None on a miss or read error"""
+        if self._conn is None:
+            return None
+        try:
+            with self._lock:
+                row = self._conn.execute(
+                    "SELECT response FROM research_cache WHERE key = ?", (key,)
+                ).fetchone()
+        except sqlite3.Error:
+            logger.warning("Research cache read failed for %s", self.db_path, exc_info=True)
+            return None
+        return row[0] if row else None
+
+    def set(self, key: str, response: str):
+        """Store a response under a key, replacing any previous entry"""
+        if self._conn is None:
+            return
+        try:
+            with self._lock:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO research_cache (key, response, created) VALUES (?, ?, ?)",
+                    (key, response, time.time())
+                )
+        except sqlite3.Error:
+            logger.warning("Research cache write failed for %s", self.db_path, exc_info=True)
+
+    def close(self):
+        """Close the underlying database connection"""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
@@ -1,13 +1,12 @@
 """
 Command-line interface for AI Topic Researcher
 """
-import json
 import click
 from dotenv import load_dotenv
 from colorama import init, Fore, Style
 
 from .models import TopicResearchRequest
-from .ai_manager import AITopicResearcher
+from .ai_manager import AITopicResearcher, DEPTH_INSTRUCTIONS
 
 # Initialize colorama for cross-platform colored output
 init(autoreset=True)
@@ -15,6 +14,43 @@ init(autoreset=True)
 # Load environment variables
 load_dotenv()
 
+# Depth choices come from the researcher so the CLI cannot drift from it
+DEPTH_CHOICE = click.Choice(list(DEPTH_INSTRUCTIONS))
+
+# Display headings for the bulleted result sections, keyed by result attribute
+SECTION_HEADINGS = {
+    "key_points": "KEY POINTS",
+    "trends": "CURRENT TRENDS",
+    "statistics": "STATISTICS & DATA",
+    "audience_interests": "AUDIENCE INTERESTS",
+    "content_angles": "CONTENT ANGLES",
+    "competitor_insights": "COMPETITOR INSIGHTS",
+}
+
+
+def _format_header(topic):
+    """Render the banner shown above research results"""
+    return "\n".join([
+        f"\n{Fore.GREEN}{'=' * 70}",
+        f"{Fore.GREEN}RESEARCH RESULTS: {topic}",
+        f"{Fore.GREEN}{'=' * 70}{Style.RESET_ALL}\n",
+    ])
+
+
+def _format_section(section, value):
+    """Render one result section, or an empty string if it has nothing to show"""
+    if section == "summary":
+        return f"{Fore.YELLOW}SUMMARY:{Style.RESET_ALL}\n{value}\n"
+    if not value:
+        return ""
+    if section == "keywords":
+        lines = [f"{Fore.YELLOW}KEYWORDS:{Style.RESET_ALL}", f"  {', '.join(value)}"]
+    else:
+        lines = [f"{Fore.YELLOW}{SECTION_HEADINGS[section]}:{Style.RESET_ALL}"]
+        lines.extend(f"  • {item}" for item in value)
+    lines.append("")
+    return "\n".join(lines)
+
 
 @click.group()
 @click.version_option(version="0.1.0")
@@ -25,19 +61,21 @@ def cli():
 
 @cli.command()
 @click.argument('topic')
-@click.option('--depth', type=click.Choice(['quick', 'standard', 'deep']), default='standard',
-              help='Research depth: quick, standard, or deep')
+@click.option('--depth', type=DEPTH_CHOICE, default='standard',
+              help=f"Research depth: {', '.join(DEPTH_INSTRUCTIONS)}")
 @click.option('--focus', multiple=True,
               help='Specific areas to focus on (can be used multiple times)')
 @click.option('--output', '-o', type=click.Path(), help='Save results to JSON file')
-def research(topic, depth, focus, output):
+@click.option('--cache', 'cache_path', type=click.Path(), envvar='TOPIC_RESEARCH_CACHE',
+              help='SQLite file used to cache AI responses for repeated requests')
+def research(topic, depth, focus, output, cache_path):
     """Research a topic dynamically using AI
     
     Example:
         topic-research research "AI in healthcare" --depth deep --focus trends --focus statistics
     """
     try:
-        researcher = AITopicResearcher()
+        researcher = AITopicResearcher(cache_path=cache_path)
         
         click.echo(f"\n{Fore.CYAN}Researching topic: {Fore.WHITE}{topic}")
         click.echo(f"{Fore.CYAN}Depth: {Fore.WHITE}{depth}")
@@ -48,74 +86,44 @@ def research(topic, depth, focus, output):
         request = TopicResearchRequest(
             topic=topic,
             depth=depth,
-            focus_areas=list(focus) if focus else []
+            focus_areas=list(focus)
         )
         
-        with click.progressbar(length=1, label='Conducting research') as bar:
-            result = researcher.research_topic(request)
-            bar.update(1)
-        
-        # Display results
-        click.echo(f"\n{Fore.GREEN}{'=' * 70}")
-        click.echo(f"{Fore.GREEN}RESEARCH RESULTS: {result.topic}")
-        click.echo(f"{Fore.GREEN}{'=' * 70}{Style.RESET_ALL}\n")
-        
-        # Summary
-        click.echo(f"{Fore.YELLOW}SUMMARY:{Style.RESET_ALL}")
-        click.echo(f"{result.summary}\n")
-        
-        # Key Points
-        if result.key_points:
-            click.echo(f"{Fore.YELLOW}KEY POINTS:{Style.RESET_ALL}")
-            for point in result.key_points:
-                click.echo(f"  • {point}")
-            click.echo()
-        
-        # Trends
-        if result.trends:
-            click.echo(f"{Fore.YELLOW}CURRENT TRENDS:{Style.RESET_ALL}")
-            for trend in result.trends:
-                click.echo(f"  • {trend}")
-            click.echo()
-        
-        # Statistics
-        if result.statistics:
-            click.echo(f"{Fore.YELLOW}STATISTICS & DATA:{Style.RESET_ALL}")
-            for stat in result.statistics:
-                click.echo(f"  • {stat}")
-            click.echo()
+        click.echo(f"{Fore.CYAN}Conducting research...{Style.RESET_ALL}")
+        # Sections that finish before the summary wait here so the summary prints first
+        held = []
+        summary_shown = False
         
-        # Audience Interests
-        if result.audience_interests:
-            click.echo(f"{Fore.YELLOW}AUDIENCE INTERESTS:{Style.RESET_ALL}")
-            for interest in result.audience_interests:
-                click.echo(f"  • {interest}")
-            click.echo()
+        def show_summary(summary):
+            nonlocal summary_shown
+            click.echo(_format_header(topic))
+            click.echo(_format_section("summary", summary))
+            for block in held:
+                click.echo(block)
+            summary_shown = True
         
-        # Content Angles
-        if result.content_angles:
-            click.echo(f"{Fore.YELLOW}CONTENT ANGLES:{Style.RESET_ALL}")
-            for angle in result.content_angles:
-                click.echo(f"  • {angle}")
-            click.echo()
+        def show_section(section, value):
+            # Print each section as soon as the researcher finishes it
+            if section == "summary":
+                if value and not summary_shown:
+                    show_summary(value)
+                return
+            block = _format_section(section, value)
+            if block and summary_shown:
+                click.echo(block)
+            elif block:
+                held.append(block)
         
-        # Competitor Insights
-        if result.competitor_insights:
-            click.echo(f"{Fore.YELLOW}COMPETITOR INSIGHTS:{Style.RESET_ALL}")
-            for insight in result.competitor_insights:
-                click.echo(f"  • {insight}")
-            click.echo()
+        result = researcher.research_topic(request, on_section=show_section)
         
-        # Keywords
-        if result.keywords:
-            click.echo(f"{Fore.YELLOW}KEYWORDS:{Style.RESET_ALL}")
-            click.echo(f"  {', '.join(result.keywords)}")
-            click.echo()
+        # Without a SUMMARY section the summary is only known once the response is parsed
+        if not summary_shown:
+            show_summary(result.summary)
         
         # Save to file if requested
         if output:
-            with open(output, 'w') as f:
-                json.dump(result.model_dump(), f, indent=2)
+            with open(output, 'w', encoding='utf-8') as f:
+                f.write(result.model_dump_json(indent=2))
             click.echo(f"{Fore.GREEN}✓ Results saved to {output}{Style.RESET_ALL}\n")
         
     except ValueError as e:
@@ -130,27 +138,31 @@ def research(topic, depth, focus, output):
 @cli.command()
 @click.argument('topic')
 @click.option('--output', '-o', type=click.Path(), help='Save results to JSON file')
-def quick(topic, output):
+@click.option('--cache', 'cache_path', type=click.Path(), envvar='TOPIC_RESEARCH_CACHE',
+              help='SQLite file used to cache AI responses for repeated requests')
+def quick(topic, output, cache_path):
     """Quick research on a topic (faster, less detailed)
     
     Example:
         topic-research quick "sustainable fashion"
     """
     ctx = click.get_current_context()
-    ctx.invoke(research, topic=topic, depth='quick', focus=(), output=output)
+    ctx.invoke(research, topic=topic, depth='quick', focus=(), output=output, cache_path=cache_path)
 
 
 @cli.command()
 @click.argument('topic')
 @click.option('--output', '-o', type=click.Path(), help='Save results to JSON file')
-def deep(topic, output):
+@click.option('--cache', 'cache_path', type=click.Path(), envvar='TOPIC_RESEARCH_CACHE',
+              help='SQLite file used to cache AI responses for repeated requests')
+def deep(topic, output, cache_path):
     """Deep research on a topic (slower, more detailed)
     
     Example:
         topic-research deep "quantum computing applications"
     """
     ctx = click.get_current_context()
-    ctx.invoke(research, topic=topic, depth='deep', focus=(), output=output)
+    ctx.invoke(research, topic=topic, depth='deep', focus=(), output=output, cache_path=cache_path)
 
 
 def main():
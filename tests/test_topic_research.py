@@ -1,16 +1,21 @@
 """
 Tests for Topic Research functionality
 """
+import json
+import threading
+import time
+from concurrent.futures import Future
 import pytest
 from unittest.mock import Mock, patch, MagicMock
 from brand_manager.models import TopicResearchRequest, TopicResearchResult
-from brand_manager.ai_manager import AITopicResearcher
+from brand_manager.ai_manager import AITopicResearcher, StreamingResearchParser, DEPTH_INSTRUCTIONS
+from brand_manager.cache import ResearchCache
 
 
 @pytest.fixture
 def mock_openai_client():
     """Create a mock OpenAI client"""
-    with patch('brand_manager.ai_manager.OpenAI') as mock_openai:
+    with patch('openai.OpenAI') as mock_openai:
         mock_client = MagicMock()
         mock_openai.return_value = mock_client
         
@@ -141,6 +146,54 @@ class TestAITopicResearcher:
         researcher = AITopicResearcher(api_key="test-key")
         assert researcher.api_key == "test-key"
     
+    def test_client_created_lazily(self):
+        """Test the OpenAI client is only created when first needed"""
+        with patch('openai.OpenAI') as mock_openai:
+            researcher = AITopicResearcher(api_key="test-key")
+            assert not mock_openai.called
+            
+            assert researcher.client is researcher.client
+            mock_openai.assert_called_once_with(api_key="test-key")
+    
+    def test_client_can_be_replaced(self, mock_openai_client):
+        """Test assigning a client uses it instead of creating one"""
+        custom_client = MagicMock()
+        custom_client.chat.completions.create.return_value.choices[0].message.content = "SUMMARY:\nCustom."
+        researcher = AITopicResearcher(api_key="test-key")
+        
+        researcher.client = custom_client
+        researcher.research_topic(TopicResearchRequest(topic="AI"))
+        
+        assert researcher.client is custom_client
+        assert custom_client.chat.completions.create.called
+        assert not mock_openai_client.chat.completions.create.called
+    
+    def test_client_created_once_across_threads(self):
+        """Test concurrent first accesses share a single OpenAI client"""
+        start = threading.Barrier(4)
+        
+        def slow_openai(**kwargs):
+            time.sleep(0.05)
+            return MagicMock()
+        
+        with patch('openai.OpenAI', side_effect=slow_openai) as mock_openai:
+            researcher = AITopicResearcher(api_key="test-key")
+            clients = []
+            
+            def access():
+                start.wait(5)
+                clients.append(researcher.client)
+            
+            threads = [threading.Thread(target=access) for _ in range(4)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join(5)
+        
+        assert mock_openai.call_count == 1
+        assert len(clients) == 4
+        assert all(client is clients[0] for client in clients)
+    
     def test_researcher_initialization_without_key(self):
         """Test researcher initialization without API key raises error"""
         with patch.dict('os.environ', {}, clear=True):
@@ -172,6 +225,16 @@ class TestAITopicResearcher:
         assert len(result.statistics) > 0
         assert mock_openai_client.chat.completions.create.called
     
+    def test_research_topic_model_and_token_budget(self, mock_openai_client):
+        """Test model and max_tokens overrides reach the API call"""
+        researcher = AITopicResearcher(api_key="test-key", model="gpt-4o-mini", max_tokens=800)
+        
+        researcher.research_topic(TopicResearchRequest(topic="test topic"))
+        
+        call_kwargs = mock_openai_client.chat.completions.create.call_args[1]
+        assert call_kwargs['model'] == "gpt-4o-mini"
+        assert call_kwargs['max_tokens'] == 800
+    
     def test_research_topic_with_focus_areas(self, mock_openai_client):
         """Test research with specific focus areas"""
         researcher = AITopicResearcher(api_key="test-key")
@@ -193,6 +256,19 @@ class TestAITopicResearcher:
         assert "trends" in prompt.lower()
         assert "statistics" in prompt.lower()
     
+    def test_prompt_variable_content_comes_last(self, mock_openai_client):
+        """Test prompts for different requests share the fixed prefix"""
+        researcher = AITopicResearcher(api_key="test-key")
+        
+        first = researcher._build_prompt(TopicResearchRequest(topic="AI", depth="quick"))
+        second = researcher._build_prompt(
+            TopicResearchRequest(topic="blockchain", depth="deep", focus_areas=["trends"])
+        )
+        
+        prefix = first[:first.index(DEPTH_INSTRUCTIONS["quick"])]
+        assert second.startswith(prefix)
+        assert first.endswith('Topic: "AI"')
+    
     def test_research_topic_quick_depth(self, mock_openai_client):
         """Test quick depth research"""
         researcher = AITopicResearcher(api_key="test-key")
@@ -291,3 +367,459 @@ Just a summary with nothing else."""
         assert result.key_points == []
         assert result.trends == []
         assert result.competitor_insights == []
+
+
+class TestResearchCache:
+    """Test ResearchCache and cached research"""
+    
+    def test_cache_miss_returns_none(self, tmp_path):
+        """Test unknown keys are cache misses"""
+        cache = ResearchCache(str(tmp_path / "cache.db"))
+        assert cache.get("missing") is None
+    
+    def test_cache_round_trip(self, tmp_path):
+        """Test stored responses survive reopening the cache"""
+        db_path = str(tmp_path / "cache.db")
+        cache = ResearchCache(db_path)
+        cache.set("key", "response text")
+        cache.close()
+        assert ResearchCache(db_path).get("key") == "response text"
+    
+    def test_cache_uses_wal_journal(self, tmp_path):
+        """Test the cache connection runs in WAL mode"""
+        cache = ResearchCache(str(tmp_path / "cache.db"))
+        mode = cache._conn.execute("PRAGMA journal_mode").fetchone()[0]
+        assert mode == "wal"
+    
+    def test_cache_errors_degrade_to_misses(self, tmp_path, caplog):
+        """Test database errors are logged instead of breaking research"""
+        cache = ResearchCache(str(tmp_path / "cache.db"))
+        cache.close()
+        
+        with caplog.at_level("WARNING", logger="brand_manager.cache"):
+            cache.set("key", "response")
+            assert cache.get("key") is None
+        
+        assert "Research cache write failed" in caplog.text
+        assert "Research cache read failed" in caplog.text
+    
+    def test_unopenable_cache_is_disabled(self, mock_openai_client, tmp_path, caplog):
+        """Test a cache that cannot be opened is logged and research still runs"""
+        cache_path = str(tmp_path / "missing" / "cache.db")
+        
+        with caplog.at_level("WARNING", logger="brand_manager.cache"):
+            researcher = AITopicResearcher(api_key="test-key", cache_path=cache_path)
+        
+        assert "Research cache unavailable" in caplog.text
+        request = TopicResearchRequest(topic="AI")
+        researcher.research_topic(request)
+        researcher.research_topic(request)
+        assert mock_openai_client.chat.completions.create.call_count == 2
+        researcher.cache.close()
+    
+    def test_make_key_is_stable(self):
+        """Test cache keys depend only on their parts"""
+        assert ResearchCache.make_key("a", "b") == ResearchCache.make_key("a", "b")
+        assert ResearchCache.make_key("a", "b") != ResearchCache.make_key("a", "c")
+    
+    def test_research_topic_uses_cache(self, mock_openai_client, tmp_path):
+        """Test identical requests only call the API once"""
+        researcher = AITopicResearcher(api_key="test-key", cache_path=str(tmp_path / "cache.db"))
+        request = TopicResearchRequest(topic="AI in healthcare")
+        
+        first = researcher.research_topic(request)
+        second = researcher.research_topic(request)
+        
+        assert mock_openai_client.chat.completions.create.call_count == 1
+        assert first == second
+    
+    def test_cache_hit_skips_client_creation(self, mock_openai_client, tmp_path):
+        """Test a fully cached run never creates an OpenAI client"""
+        cache_path = str(tmp_path / "cache.db")
+        request = TopicResearchRequest(topic="AI in healthcare")
+        AITopicResearcher(api_key="test-key", cache_path=cache_path).research_topic(request)
+        
+        researcher = AITopicResearcher(api_key="test-key", cache_path=cache_path)
+        researcher.research_topic(request)
+        
+        assert researcher._client is None
+    
+    def test_research_topic_cache_bypass(self, mock_openai_client, tmp_path):
+        """Test use_cache=False always calls the API"""
+        researcher = AITopicResearcher(api_key="test-key", cache_path=str(tmp_path / "cache.db"))
+        request = TopicResearchRequest(topic="AI in healthcare")
+        
+        researcher.research_topic(request)
+        researcher.research_topic(request, use_cache=False)
+        
+        assert mock_openai_client.chat.completions.create.call_count == 2
+    
+    def test_research_topic_cache_keyed_by_request(self, mock_openai_client, tmp_path):
+        """Test different requests do not share cache entries"""
+        researcher = AITopicResearcher(api_key="test-key", cache_path=str(tmp_path / "cache.db"))
+        
+        researcher.research_topic(TopicResearchRequest(topic="AI", depth="quick"))
+        researcher.research_topic(TopicResearchRequest(topic="AI", depth="deep"))
+        
+        assert mock_openai_client.chat.completions.create.call_count == 2
+
+
+SAMPLE_STREAMED_RESPONSE = """SUMMARY:
+Streaming research summary.
+
+KEY POINTS:
+- First point
+- Second point
+
+KEYWORDS:
+streaming, research"""
+
+
+def _stream_chunks(text, size):
+    """Build mock streaming chunks of the given size"""
+    chunks = []
+    for i in range(0, len(text), size):
+        chunk = MagicMock()
+        chunk.choices = [MagicMock()]
+        chunk.choices[0].delta.content = text[i:i + size]
+        chunks.append(chunk)
+    return chunks
+
+
+class TestStreamingResearchParser:
+    """Test StreamingResearchParser"""
+    
+    def test_chunked_feed_matches_whole_feed(self):
+        """Test headers split across chunks are still detected"""
+        whole = StreamingResearchParser("test")
+        whole.feed(SAMPLE_STREAMED_RESPONSE)
+        
+        chunked = StreamingResearchParser("test")
+        for i in range(0, len(SAMPLE_STREAMED_RESPONSE), 3):
+            chunked.feed(SAMPLE_STREAMED_RESPONSE[i:i + 3])
+        
+        assert chunked.finalize() == whole.finalize()
+    
+    def test_statistics_header_variants(self):
+        """Test any header starting with STATISTICS opens the statistics section"""
+        parser = StreamingResearchParser("test")
+        parser.feed("SUMMARY:\nA summary.\nSTATISTICS AND FIGURES:\n- 40% growth")
+        result = parser.finalize()
+        assert result.statistics == ["40% growth"]
+    
+    def test_sections_reported_as_completed(self):
+        """Test the callback receives each section once it is complete"""
+        seen = []
+        parser = StreamingResearchParser("test", on_section=lambda name, value: seen.append((name, value)))
+        
+        parser.feed("SUMMARY:\nA summary.\nKEY POINTS:\n- One\n")
+        assert seen == [("summary", "A summary.")]
+        
+        parser.feed("KEYWORDS:\na, b")
+        parser.finalize()
+        assert seen == [
+            ("summary", "A summary."),
+            ("key_points", ["One"]),
+            ("keywords", ["a", "b"]),
+        ]
+    
+    def test_repeated_header_reports_only_new_items(self):
+        """Test a repeated header reports each item once and passes copies"""
+        seen = []
+        parser = StreamingResearchParser("test", on_section=lambda name, value: seen.append((name, value)))
+        
+        parser.feed("KEY POINTS:\n- a\nCURRENT TRENDS:\n- t\nKEY POINTS:\n- b\nKEYWORDS:\nx")
+        result = parser.finalize()
+        
+        assert seen == [
+            ("key_points", ["a"]),
+            ("trends", ["t"]),
+            ("key_points", ["b"]),
+            ("keywords", ["x"]),
+        ]
+        assert result.key_points == ["a", "b"]
+
+
+class TestStreamingResearch:
+    """Test streamed research through AITopicResearcher"""
+    
+    def test_research_topic_streams_with_callback(self, mock_openai_client):
+        """Test on_section switches to a streamed completion"""
+        mock_openai_client.chat.completions.create.return_value = _stream_chunks(SAMPLE_STREAMED_RESPONSE, 7)
+        researcher = AITopicResearcher(api_key="test-key")
+        seen = []
+        
+        result = researcher.research_topic(
+            TopicResearchRequest(topic="streaming"),
+            on_section=lambda name, value: seen.append(name)
+        )
+        
+        call_kwargs = mock_openai_client.chat.completions.create.call_args[1]
+        assert call_kwargs['stream'] is True
+        assert seen == ["summary", "key_points", "keywords"]
+        assert result.summary == "Streaming research summary."
+        assert result.key_points == ["First point", "Second point"]
+    
+    def test_cached_streamed_response_replays_sections(self, mock_openai_client, tmp_path):
+        """Test a streamed response is cached and replayed through the callback"""
+        mock_openai_client.chat.completions.create.return_value = _stream_chunks(SAMPLE_STREAMED_RESPONSE, 5)
+        researcher = AITopicResearcher(api_key="test-key", cache_path=str(tmp_path / "cache.db"))
+        request = TopicResearchRequest(topic="streaming")
+        
+        first = researcher.research_topic(request, on_section=lambda name, value: None)
+        seen = []
+        second = researcher.research_topic(request, on_section=lambda name, value: seen.append(name))
+        
+        assert mock_openai_client.chat.completions.create.call_count == 1
+        assert seen == ["summary", "key_points", "keywords"]
+        assert first == second
+
+
+class TestBatchResearch:
+    """Test researching several topics at once"""
+    
+    def test_research_topics_preserves_order(self, mock_openai_client):
+        """Test results come back in request order"""
+        researcher = AITopicResearcher(api_key="test-key")
+        topics = ["AI", "blockchain", "climate", "fintech", "robotics"]
+        
+        results = researcher.research_topics(
+            [TopicResearchRequest(topic=topic) for topic in topics],
+            max_concurrency=3
+        )
+        
+        assert [result.topic for result in results] == topics
+        assert mock_openai_client.chat.completions.create.call_count == len(topics)
+    
+    def test_research_topics_deduplicates_requests(self, mock_openai_client):
+        """Test identical requests in a batch call the API once but get separate results"""
+        researcher = AITopicResearcher(api_key="test-key")
+        requests = [
+            TopicResearchRequest(topic="AI"),
+            TopicResearchRequest(topic="blockchain"),
+            TopicResearchRequest(topic="AI"),
+        ]
+        
+        results = researcher.research_topics(requests)
+        
+        assert [result.topic for result in results] == ["AI", "blockchain", "AI"]
+        assert results[0] == results[2]
+        assert results[0] is not results[2]
+        results[2].key_points.append("Edited")
+        assert "Edited" not in results[0].key_points
+        assert mock_openai_client.chat.completions.create.call_count == 2
+    
+    def test_concurrent_identical_calls_are_coalesced(self, mock_openai_client):
+        """Test identical calls in flight at the same time share one API call"""
+        response = mock_openai_client.chat.completions.create.return_value
+        entered = threading.Event()
+        waiting = threading.Event()
+        release = threading.Event()
+        
+        class SignallingFuture(Future):
+            def result(self, timeout=None):
+                waiting.set()
+                return super().result(timeout)
+        
+        def slow_create(**kwargs):
+            entered.set()
+            release.wait(5)
+            return response
+        
+        mock_openai_client.chat.completions.create.side_effect = slow_create
+        researcher = AITopicResearcher(api_key="test-key")
+        request = TopicResearchRequest(topic="AI")
+        results = []
+        
+        first = threading.Thread(target=lambda: results.append(researcher.research_topic(request)))
+        second = threading.Thread(target=lambda: results.append(researcher.research_topic(request)))
+        with patch('brand_manager.ai_manager.Future', SignallingFuture):
+            first.start()
+            assert entered.wait(5)
+            second.start()
+            # Release the owner only once the second call is waiting on its Future
+            assert waiting.wait(5)
+            release.set()
+            first.join(5)
+            second.join(5)
+        
+        assert mock_openai_client.chat.completions.create.call_count == 1
+        assert len(results) == 2
+        assert results[0] == results[1]
+        assert results[0] is not results[1]
+        assert researcher._inflight == {}
+    
+    def test_failed_call_is_not_remembered(self, mock_openai_client):
+        """Test an API error is raised and the next identical call retries"""
+        response = mock_openai_client.chat.completions.create.return_value
+        mock_openai_client.chat.completions.create.side_effect = [RuntimeError("boom"), response]
+        researcher = AITopicResearcher(api_key="test-key")
+        request = TopicResearchRequest(topic="AI")
+        
+        with pytest.raises(RuntimeError):
+            researcher.research_topic(request)
+        
+        assert researcher.research_topic(request).topic == "AI"
+        assert mock_openai_client.chat.completions.create.call_count == 2
+    
+    def test_research_topics_empty(self, mock_openai_client):
+        """Test an empty batch makes no API calls"""
+        researcher = AITopicResearcher(api_key="test-key")
+        assert researcher.research_topics([]) == []
+        assert not mock_openai_client.chat.completions.create.called
+    
+    def test_research_topics_rejects_non_positive_concurrency(self, mock_openai_client):
+        """Test max_concurrency below 1 is rejected before any API call"""
+        researcher = AITopicResearcher(api_key="test-key")
+        
+        with pytest.raises(ValueError, match="max_concurrency"):
+            researcher.research_topics([TopicResearchRequest(topic="AI")], max_concurrency=0)
+        
+        assert not mock_openai_client.chat.completions.create.called
+
+
+class TestJsonModeResearch:
+    """Test structured JSON output mode"""
+    
+    SAMPLE_JSON = json.dumps({
+        "summary": "AI is changing healthcare.",
+        "key_points": ["Faster diagnosis", "Lower costs"],
+        "trends": ["Telemedicine"],
+        "statistics": ["60% of hospitals invest in AI"],
+        "audience_interests": ["Privacy"],
+        "content_angles": ["Case studies"],
+        "competitor_insights": ["Few practical guides exist"],
+        "keywords": ["AI", "healthcare"]
+    })
+    
+    def test_json_mode_requests_json_object(self, mock_openai_client):
+        """Test JSON mode asks for a JSON object and parses it"""
+        mock_openai_client.chat.completions.create.return_value.choices[0].message.content = self.SAMPLE_JSON
+        researcher = AITopicResearcher(api_key="test-key", json_mode=True)
+        
+        result = researcher.research_topic(TopicResearchRequest(topic="AI in healthcare"))
+        
+        call_kwargs = mock_openai_client.chat.completions.create.call_args[1]
+        assert call_kwargs['response_format'] == {"type": "json_object"}
+        assert "json object" in call_kwargs['messages'][1]['content'].lower()
+        assert result.summary == "AI is changing healthcare."
+        assert result.key_points == ["Faster diagnosis", "Lower costs"]
+        assert result.keywords == ["AI", "healthcare"]
+    
+    def test_json_mode_reports_sections(self, mock_openai_client):
+        """Test JSON mode still reports sections to the callback"""
+        mock_openai_client.chat.completions.create.return_value.choices[0].message.content = self.SAMPLE_JSON
+        researcher = AITopicResearcher(api_key="test-key", json_mode=True)
+        seen = []
+        
+        researcher.research_topic(
+            TopicResearchRequest(topic="AI in healthcare"),
+            on_section=lambda name, value: seen.append(name)
+        )
+        
+        assert 'stream' not in mock_openai_client.chat.completions.create.call_args[1]
+        assert seen[0] == "summary"
+        assert "keywords" in seen
+    
+    def test_parse_research_json_normalizes_values(self, mock_openai_client):
+        """Test missing keys and comma-separated keywords are handled"""
+        researcher = AITopicResearcher(api_key="test-key", json_mode=True)
+        
+        result = researcher._parse_research_json(
+            "test", json.dumps({"summary": "Short.", "keywords": "a, b ,c", "trends": "One trend"})
+        )
+        
+        assert result.summary == "Short."
+        assert result.keywords == ["a", "b", "c"]
+        assert result.trends == ["One trend"]
+        assert result.key_points == []
+    
+    def test_parse_research_json_flattens_nested_values(self, mock_openai_client):
+        """Test list summaries are joined and nested items are flattened, not repr'd"""
+        researcher = AITopicResearcher(api_key="test-key", json_mode=True)
+        
+        result = researcher._parse_research_json("test", json.dumps({
+            "summary": ["AI is growing.", "Adoption is rising."],
+            "key_points": [{"point": "Faster diagnosis"}, ["Lower costs", 42], None, True],
+        }))
+        
+        assert result.summary == "AI is growing. Adoption is rising."
+        assert result.key_points == ["Faster diagnosis", "Lower costs", "42"]
+    
+    def test_parse_research_json_fills_missing_summary(self, mock_openai_client):
+        """Test a missing summary falls back to the first sentences of the content"""
+        researcher = AITopicResearcher(api_key="test-key", json_mode=True)
+        
+        result = researcher._parse_research_json(
+            "test", json.dumps({"summary": "", "key_points": ["Faster diagnosis", "Lower costs"]})
+        )
+        
+        assert result.summary == "Faster diagnosis. Lower costs."
+    
+    def test_parse_research_json_falls_back_to_sections(self, mock_openai_client, caplog):
+        """Test non-JSON responses are parsed with the section parser"""
+        researcher = AITopicResearcher(api_key="test-key", json_mode=True)
+        
+        with caplog.at_level("WARNING", logger="brand_manager.ai_manager"):
+            result = researcher._parse_research_json("test", SAMPLE_STREAMED_RESPONSE)
+        
+        assert "was not a JSON object" in caplog.text
+        
+        assert result.summary == "Streaming research summary."
+        assert result.key_points == ["First point", "Second point"]
+
+
+class TestResultFormatting:
+    """Test CLI rendering of research results"""
+    
+    def test_format_section_skips_empty_sections(self):
+        """Test only populated sections are rendered"""
+        from brand_manager.cli import _format_section
+        
+        assert "  • Point 1" in _format_section("key_points", ["Point 1"])
+        assert "AI, ML" in _format_section("keywords", ["AI", "ML"])
+        assert _format_section("trends", []) == ""
+    
+    def test_research_command_streams_sections(self, mock_openai_client, monkeypatch):
+        """Test the research command prints sections from a streamed response"""
+        from click.testing import CliRunner
+        from brand_manager.cli import research
+        
+        monkeypatch.setenv("OPENAI_API_KEY", "test-key")
+        mock_openai_client.chat.completions.create.return_value = _stream_chunks(SAMPLE_STREAMED_RESPONSE, 6)
+        
+        output = CliRunner().invoke(research, ["AI"]).output
+        
+        assert mock_openai_client.chat.completions.create.call_args[1]['stream'] is True
+        assert output.count("RESEARCH RESULTS: AI") == 1
+        assert "Streaming research summary." in output
+        assert "  • Second point" in output
+        assert "streaming, research" in output
+    
+    def test_research_command_repeated_header_prints_items_once(self, mock_openai_client, monkeypatch):
+        """Test items under a repeated header are not printed twice"""
+        from click.testing import CliRunner
+        from brand_manager.cli import research
+        
+        monkeypatch.setenv("OPENAI_API_KEY", "test-key")
+        response = "SUMMARY:\nA summary.\nKEY POINTS:\n- a\nCURRENT TRENDS:\n- t\nKEY POINTS:\n- b\n"
+        mock_openai_client.chat.completions.create.return_value = _stream_chunks(response, 6)
+        
+        output = CliRunner().invoke(research, ["AI"]).output
+        
+        assert output.count("  • a") == 1
+        assert output.count("  • b") == 1
+    
+    def test_research_command_prints_fallback_summary_first(self, mock_openai_client, monkeypatch):
+        """Test a summary built after parsing still prints before other sections"""
+        from click.testing import CliRunner
+        from brand_manager.cli import research
+        
+        monkeypatch.setenv("OPENAI_API_KEY", "test-key")
+        response = "Intro sentence.\nKEY POINTS:\n- a\nKEYWORDS:\nx, y\n"
+        mock_openai_client.chat.completions.create.return_value = _stream_chunks(response, 6)
+        
+        output = CliRunner().invoke(research, ["AI"]).output
+        
+        assert output.index("SUMMARY:") < output.index("KEY POINTS:") < output.index("KEYWORDS:")
+        assert output.count("RESEARCH RESULTS: AI") == 1